@@ -1,30 +1,49 @@
 import csv
 import sys
 
-from util import Node, StackFrontier, QueueFrontier
+import numpy as np
 
 # Maps names to a set of corresponding person_ids
 names = {}
 
-# Maps person_ids to a dictionary of: name, birth, movies (a set of movie_ids)
+# Maps person_ids to a dictionary of: name, birth
 people = {}
 
-# Maps movie_ids to a dictionary of: title, year, stars (a set of person_ids)
+# Maps movie_ids to a dictionary of: title, year
 movies = {}
 
+# Maps person_ids/movie_ids to contiguous int indexes, and back again
+person_index = {}
+movie_index = {}
+person_ids = []
+movie_ids = []
+
+# CSR-style adjacency over the interned indexes: the movies for person p are
+# person_movies_indices[person_movies_indptr[p]:person_movies_indptr[p + 1]],
+# and movie_stars_* is the transpose (the stars for each movie)
+person_movies_indptr = None
+person_movies_indices = None
+movie_stars_indptr = None
+movie_stars_indices = None
+
 
 def load_data(directory):
     """
     Load data from CSV files into memory.
     """
+    global person_movies_indptr, person_movies_indices
+    global movie_stars_indptr, movie_stars_indices
+
     # Load people
     with open(f"{directory}/people.csv", encoding="utf-8") as f:
         reader = csv.DictReader(f)
         for row in reader:
+            # Intern each person_id as the next int index
+            person_index[row["id"]] = len(person_ids)
+            person_ids.append(row["id"])
             people[row["id"]] = {
                 "name": row["name"],
-                "birth": row["birth"],
-                "movies": set()
+                "birth": row["birth"]
             }
             if row["name"].lower() not in names:
                 names[row["name"].lower()] = {row["id"]}
@@ -35,22 +54,45 @@ def load_data(directory):
     with open(f"{directory}/movies.csv", encoding="utf-8") as f:
         reader = csv.DictReader(f)
         for row in reader:
+            # Intern each movie_id as the next int index
+            movie_index[row["id"]] = len(movie_ids)
+            movie_ids.append(row["id"])
             movies[row["id"]] = {
                 "title": row["title"],
-                "year": row["year"],
-                "stars": set()
+                "year": row["year"]
             }
 
-    # Load stars
+    # Load stars as (person_index, movie_index) pairs
+    star_people = []
+    star_movies = []
     with open(f"{directory}/stars.csv", encoding="utf-8") as f:
         reader = csv.DictReader(f)
         for row in reader:
             try:
-                people[row["person_id"]]["movies"].add(row["movie_id"])
-                movies[row["movie_id"]]["stars"].add(row["person_id"])
+                star_people.append(person_index[row["person_id"]])
+                star_movies.append(movie_index[row["movie_id"]])
             except KeyError:
                 pass
 
+    # Build the adjacency arrays in both directions
+    star_people = np.asarray(star_people, dtype=np.int32)
+    star_movies = np.asarray(star_movies, dtype=np.int32)
+    person_movies_indptr, person_movies_indices = build_csr(
+        star_people, star_movies, len(person_ids)
+    )
+    movie_stars_indptr, movie_stars_indices = build_csr(
+        star_movies, star_people, len(movie_ids)
+    )
+
+
+# Given parallel arrays of edges (row -> col), returns (indptr, indices)
+# arrays such that the cols for row r are indices[indptr[r]:indptr[r + 1]]
+def build_csr(rows, cols, n):
+    indptr = np.zeros(n + 1, dtype=np.int32)
+    indptr[1:] = np.cumsum(np.bincount(rows, minlength=n))
+    indices = cols[np.argsort(rows, kind="stable")]
+    return indptr, indices
+
 
 def main():
     if len(sys.argv) > 2:
@@ -110,16 +152,15 @@ def person_id_for_name(name):
         return person_ids[0]
 
 
-def neighbors_for_person(person_id):
+def neighbors_for_person(person):
     """
-    Returns (movie_id, person_id) pairs for people
-    who starred with a given person.
+    Returns (movie_index, person_index) pairs for people
+    who starred with a given person (as interned int indexes).
     """
-    movie_ids = people[person_id]["movies"]
     neighbors = set()
-    for movie_id in movie_ids:
-        for person_id in movies[movie_id]["stars"]:
-            neighbors.add((movie_id, person_id))
+    for movie in person_movies_indices[person_movies_indptr[person]:person_movies_indptr[person + 1]]:
+        for star in movie_stars_indices[movie_stars_indptr[movie]:movie_stars_indptr[movie + 1]]:
+            neighbors.add((movie, star))
     return neighbors
 
 
@@ -136,78 +177,87 @@ def shortest_path(source, target):
     If no possible path, returns None.
     """
 
-    # Initialize frontier to just the starting position
-    # Starting node has no parent node, and no action taken to get to that node
-    start = Node(state=source, parent=None, action=None)
-    # State = person_id, parent = parent Node, action = movie_id to get to that state
-
-    # Track the states explored
-    explored_set = ExploredSet()
-
-    # Track the nodes to explore: breadth-first search
-    frontier = QueueFrontier()
-    # Initialise frontier
-    frontier.add(start)
-
-    # Loop until no nodes left to check
-    while not frontier.empty():
-        # Set node to check and remove from frontier
-        node = frontier.remove()
-        # Set state as explored
-        explored_set.add(node.state)
-
-        # If we are in the goal state, return the solution
-        if node.state == target:
-            return node_history(node)
-
-        # Else, add the possible child nodes to the frontier if their states are not already there/not explored already
-            # Actions is a set of (movid_id, person_id) tuples that you can get to from the current state (person_id)
-        actions = neighbors_for_person(node.state)
-        # For each tuple in actions
-        for mid_pid in actions:
-            # If the target exists in a possible child node, immediately recognise the answer
-            if mid_pid[1] == target:
-                node = Node(state=target, parent=node, action=mid_pid[0])
-                return node_history(node)
-            # Add node to frontier if no explored and not already there
-            if (not frontier.contains_state(mid_pid[1])) and (not explored_set.contains_state(mid_pid[1])):
-                frontier.add(Node(state=mid_pid[1], parent=node, action=mid_pid[0]))
-
-        continue
-
-    # Here, frontier is empty and nothing has been returned yet, there must be no connection between the actors
+    if source == target:
+        return []
+
+    # The search runs entirely over the interned int indexes
+    source = person_index[source]
+    target = person_index[target]
+
+    # Bidirectional BFS: expand one level at a time from both ends and stop
+    # as soon as the two searches meet, which visits far fewer people than
+    # searching all the way out from the source alone
+    # Each parent dict maps a reached person_id to the (parent_person_id, movie_id)
+    # step used to reach it; the two start people have no parent step
+    parent_fwd = {source: None}
+    parent_bwd = {target: None}
+
+    # One bool per person per direction: visited tests are a flat array
+    # index instead of a hash lookup
+    visited_fwd = np.zeros(len(person_ids), dtype=bool)
+    visited_bwd = np.zeros(len(person_ids), dtype=bool)
+    visited_fwd[source] = True
+    visited_bwd[target] = True
+
+    # The people discovered in the most recent level of each search
+    front_fwd = {source}
+    front_bwd = {target}
+
+    # Loop until either search runs out of new people to reach
+    while front_fwd and front_bwd:
+        # Always expand the smaller frontier: keeps the two search trees balanced
+        expand_fwd = len(front_fwd) <= len(front_bwd)
+        frontier = front_fwd if expand_fwd else front_bwd
+        parents = parent_fwd if expand_fwd else parent_bwd
+        visited = visited_fwd if expand_fwd else visited_bwd
+        other_visited = visited_bwd if expand_fwd else visited_fwd
+
+        next_frontier = set()
+        for person_id in frontier:
+            for movie_id, neighbor_id in neighbors_for_person(person_id):
+                # Skip people this search has already reached
+                if visited[neighbor_id]:
+                    continue
+                visited[neighbor_id] = True
+                parents[neighbor_id] = (person_id, movie_id)
+                # If the other search already reached this person, the searches
+                # have met and a full path exists through them
+                if other_visited[neighbor_id]:
+                    return joined_path(neighbor_id, parent_fwd, parent_bwd)
+                next_frontier.add(neighbor_id)
+
+        if expand_fwd:
+            front_fwd = next_frontier
+        else:
+            front_bwd = next_frontier
+
+    # Here, a frontier is empty and nothing has been returned yet, there must be no connection between the actors
     return None
 
 
-# Set of all states (person_id) explored
-class ExploredSet():
-    def __init__(self):
-        self.explored_set = set()
-
-    def add(self, state):
-        self.explored_set.add(state)
-
-    def contains_state(self, state):
-        if state in self.explored_set:
-            return True
-        return False
-
-
-# Given a node, returns a list of tuples (movie_id, person_id) to get to that node
-def node_history(node: Node):
-    history = []
-
-    # Loop through all parent nodes
-    while True:
-        # Return if no parent node (i.e. we are at the initial node)
-        if node.parent is None:
-            # Reverse the list to give correct order of exploration
-            history.reverse()
-            return history
-        # Add tuple to list for each node, parent node, grandparent node, etc
-        history.append((node.action, node.state))
-        # Go up the family tree
-        node = node.parent
+# Given the person where the two searches met and both parent dicts (all as
+# interned int indexes), returns the full list of (movie_id, person_id)
+# tuples from source to target, mapped back to the original string IDs
+def joined_path(meet, parent_fwd, parent_bwd):
+    path = []
+
+    # Walk from the meeting person back to the source
+    person = meet
+    while parent_fwd[person] is not None:
+        parent, movie = parent_fwd[person]
+        path.append((movie_ids[movie], person_ids[person]))
+        person = parent
+    # Reverse so the path reads source -> meeting person
+    path.reverse()
+
+    # Walk from the meeting person on to the target
+    person = meet
+    while parent_bwd[person] is not None:
+        parent, movie = parent_bwd[person]
+        path.append((movie_ids[movie], person_ids[parent]))
+        person = parent
+
+    return path
 
 
 if __name__ == "__main__":
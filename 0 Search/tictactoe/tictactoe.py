@@ -3,7 +3,8 @@ Tic Tac Toe Player
 """
 
 import math
-import copy
+
+import numpy as np
 
 X = "X"
 O = "O"
@@ -19,12 +20,9 @@ def initial_state():
 
 # Returns player who has the next turn on a board.
 def player(board):
-    count = 0
-    for row in board:
-        for col in row:
-            if not col == EMPTY:
-                count += 1
-    if count % 2 == 0:
+    # only the parity of the number of marks matters: X moves on even counts
+    empties = sum(row.count(EMPTY) for row in board)
+    if empties % 2 == 1:
         return X
     return O
 
@@ -45,7 +43,8 @@ def result(board, action):
         # if action is a taken cell, raise error
         raise Exception("bad action")
     else:
-        resulting_board = copy.deepcopy(board)
+        # rows only hold immutable marks, so copying each row is enough
+        resulting_board = [row[:] for row in board]
         # fill action cell with whose turn it is
         resulting_board[action[0]][action[1]] = player(board)
         return resulting_board
@@ -55,33 +54,20 @@ def result(board, action):
 def winner(board):
     # X worth 1, O worth -1
     # winner exists if the sum of any row, col, or diag is +3 or -3
-    sum_row = [0, 0, 0]
-    sum_col = [0, 0, 0]
-    sum_diag = [0, 0]
-
-    for i in range(3):
-        for j in range(3):
-            if board[i][j] == X:
-                sum_row[i] += 1
-                sum_col[j] += 1
-                if i == j:
-                    sum_diag[0] += 1
-                if i == 2 - j:
-                    sum_diag[1] += 1
-            elif board[i][j] == O:
-                sum_row[i] -= 1
-                sum_col[j] -= 1
-                if i == j:
-                    sum_diag[0] -= 1
-                if i == 2 - j:
-                    sum_diag[1] -= 1
-
-    for _ in [sum_row, sum_col, sum_diag]:
-        for item in _:
-            if item == 3:
-                return X
-            elif item == -3:
-                return O
+    grid = np.array([
+        [1 if cell == X else -1 if cell == O else 0 for cell in row]
+        for row in board
+    ])
+    sums = np.concatenate((
+        grid.sum(axis=0),
+        grid.sum(axis=1),
+        [grid.trace(), np.fliplr(grid).trace()]
+    ))
+
+    if (sums == 3).any():
+        return X
+    if (sums == -3).any():
+        return O
 
     # if no winner return None
     return None
@@ -110,48 +96,132 @@ def utility(board):
         return 0
 
 
+# The search itself runs on immutable bitboards: one 9-bit int per player,
+# where cell (i, j) is bit 3 * i + j. Making a move is an OR with the cell's
+# bit, so no board copying happens anywhere in the recursion.
+FULL_MASK = 0b111111111
+
+# All eight winning lines as 9-bit masks
+WIN_MASKS = (
+    0b000000111, 0b000111000, 0b111000000,  # rows
+    0b001001001, 0b010010010, 0b100100100,  # cols
+    0b100010001, 0b001010100                # diags
+)
+
+# Only the lines through the last move can have changed: the winning lines
+# that contain each cell's bit
+WIN_MASKS_BY_BIT = {
+    1 << c: tuple(mask for mask in WIN_MASKS if mask & (1 << c))
+    for c in range(9)
+}
+
+# Transposition table: (x_mask, o_mask) -> computed utility
+# Whose turn it is follows from the board, so the board alone is a valid key,
+# and the same positions recur down many different move orders
+transposition_table = {}
+
+
+# Returns the (x_mask, o_mask) bitboards for a board.
+def board_masks(board):
+    x_mask = 0
+    o_mask = 0
+    for i in range(3):
+        for j in range(3):
+            if board[i][j] == X:
+                x_mask |= 1 << (3 * i + j)
+            elif board[i][j] == O:
+                o_mask |= 1 << (3 * i + j)
+    return x_mask, o_mask
+
+
+# Returns True if the player owning mask won with their move at move_bit.
+def mask_wins(mask, move_bit):
+    return any(mask & line == line for line in WIN_MASKS_BY_BIT[move_bit])
+
+
+# Returns the empty cell bits of a position.
+def empty_bits(x_mask, o_mask):
+    taken = x_mask | o_mask
+    return [1 << c for c in range(9) if not taken & (1 << c)]
+
+
 # Returns the optimal action for the current player on the board.
 def minimax(board):
     optimal_action = None
+    x_mask, o_mask = board_masks(board)
 
     if player(board) == X:
         best_utility = -2
-        for action in actions(board):
-            new_utility = minvalue(result(board, action))
+        for bit in empty_bits(x_mask, o_mask):
+            # the best utility found so far bounds the search as alpha
+            new_utility = minvalue(x_mask | bit, o_mask, best_utility, 2, bit)
             if new_utility > best_utility:
                 best_utility = new_utility
-                optimal_action = action
+                optimal_action = divmod(bit.bit_length() - 1, 3)
     elif player(board) == O:
         best_utility = 2
-        for action in actions(board):
-            new_utility = maxvalue(result(board, action))
+        for bit in empty_bits(x_mask, o_mask):
+            # the best utility found so far bounds the search as beta
+            new_utility = maxvalue(x_mask, o_mask | bit, -2, best_utility, bit)
             if new_utility < best_utility:
                 best_utility = new_utility
-                optimal_action = action
+                optimal_action = divmod(bit.bit_length() - 1, 3)
     return optimal_action
 
 
-# Returns max utility possible from given board assuming optimal play.
-def maxvalue(board):
-    # immediately return utility for terminal boards
-    if terminal(board):
-        return utility(board)
+# Returns max utility possible from given position assuming optimal play.
+# X is to move, so last_bit (if any) was O's move.
+def maxvalue(x_mask, o_mask, alpha=-2, beta=2, last_bit=None):
+    # only the last move can have ended the game, so check just its lines
+    if last_bit is not None and mask_wins(o_mask, last_bit):
+        return -1
+    if x_mask | o_mask == FULL_MASK:
+        return 0
+    # reuse the utility if this position has been evaluated before
+    key = (x_mask, o_mask)
+    if key in transposition_table:
+        return transposition_table[key]
+    entry_alpha, entry_beta = alpha, beta
     # initialise max value at below all possible outcomes
     v = -2
     # for all remaining actions, find the max utility given the opponent minimises their utility in the next move
-    for action in actions(board):
-        v = max(v, minvalue(result(board, action)))
+    for bit in empty_bits(x_mask, o_mask):
+        v = max(v, minvalue(x_mask | bit, o_mask, alpha, beta, bit))
+        # prune: the opponent already has a better option than this branch
+        if v >= beta:
+            break
+        alpha = max(alpha, v)
+    # v is exact only if it fell strictly inside the window this call was
+    # given; outside it, v is just a bound and must not be cached
+    if entry_alpha < v < entry_beta:
+        transposition_table[key] = v
     return v
 
 
-# Returns min utility possible from given board assuming optimal play.
-def minvalue(board):
-    # immediately return utility for terminal boards
-    if terminal(board):
-        return utility(board)
+# Returns min utility possible from given position assuming optimal play.
+# O is to move, so last_bit (if any) was X's move.
+def minvalue(x_mask, o_mask, alpha=-2, beta=2, last_bit=None):
+    # only the last move can have ended the game, so check just its lines
+    if last_bit is not None and mask_wins(x_mask, last_bit):
+        return 1
+    if x_mask | o_mask == FULL_MASK:
+        return 0
+    # reuse the utility if this position has been evaluated before
+    key = (x_mask, o_mask)
+    if key in transposition_table:
+        return transposition_table[key]
+    entry_alpha, entry_beta = alpha, beta
     # initialise min value at above all possible outcomes
     v = 2
     # for all remaining actions, find the min utility given the opponent maximises their utility in the next move
-    for action in actions(board):
-        v = min(v, maxvalue(result(board, action)))
+    for bit in empty_bits(x_mask, o_mask):
+        v = min(v, maxvalue(x_mask, o_mask | bit, alpha, beta, bit))
+        # prune: the opponent already has a better option than this branch
+        if v <= alpha:
+            break
+        beta = min(beta, v)
+    # v is exact only if it fell strictly inside the window this call was
+    # given; outside it, v is just a bound and must not be cached
+    if entry_alpha < v < entry_beta:
+        transposition_table[key] = v
     return v
\ No newline at end of file
@@ -2,6 +2,8 @@ import csv
 import itertools
 import sys
 
+import numpy as np
+
 PROBS = {
 
     # Unconditional probabilities for having gene
@@ -36,6 +38,27 @@ PROBS = {
     "mutation": 0.01
 }
 
+# Tables derived from PROBS once, so joint_probability does not rebuild the
+# same terms for every assignment
+
+# Probability a parent with n genes passes one copy of the gene on
+PASS_PROB = {
+    0: PROBS["mutation"],
+    1: 0.5,
+    2: 1 - PROBS["mutation"]
+}
+
+# The same, marginalised over the population gene distribution, for a parent
+# not listed in the dataset
+PASS_PROB_UNKNOWN = sum(PROBS["gene"][n] * PASS_PROB[n] for n in range(3))
+
+# Population probability of each trait status:
+# P(trait_status) = sum over n of P(n genes) * P(trait_status|n genes)
+TRAIT_PROB = {
+    status: sum(PROBS["gene"][n] * PROBS["trait"][n][status] for n in range(3))
+    for status in [True, False]
+}
+
 
 def main():
 
@@ -60,26 +83,18 @@ def main():
         for person in people
     }
 
-    # Loop over all sets of people who might have the trait
-    names = set(people)
-    for have_trait in powerset(names):
-
-        # Check if current set of people violates known information
-        fails_evidence = any(
-            (people[person]["trait"] is not None and
-             people[person]["trait"] != (person in have_trait))
-            for person in names
-        )
-        if fails_evidence:
-            continue
-
-        # Loop over all sets of people who might have the gene
-        for one_gene in powerset(names):
-            for two_genes in powerset(names - one_gene):
-
-                # Update probabilities with new joint probability
-                p = joint_probability(people, one_gene, two_genes, have_trait)
-                update(probabilities, one_gene, two_genes, have_trait, p)
+    # Compute the joint probability of every assignment at once, then sum
+    # the slices of the table belonging to each person's gene count and
+    # trait status
+    names, joint = all_joint_probabilities(people)
+    n = len(names)
+    for i, person in enumerate(names):
+        person_genes = (np.arange(3 ** n) // 3 ** i) % 3
+        person_traits = (np.arange(2 ** n) >> i) & 1
+        for genes in range(3):
+            probabilities[person]["gene"][genes] = joint[person_genes == genes].sum()
+        for status in [True, False]:
+            probabilities[person]["trait"][status] = joint[:, person_traits == int(status)].sum()
 
     # Ensure probabilities sum to 1
     normalize(probabilities)
@@ -118,14 +133,13 @@ def load_data(filename):
 
 def powerset(s):
     """
-    Return a list of all possible subsets of set s.
+    Yield every possible subset of set s, one at a time.
     """
     s = list(s)
-    return [
-        set(s) for s in itertools.chain.from_iterable(
-            itertools.combinations(s, r) for r in range(len(s) + 1)
-        )
-    ]
+    for subset in itertools.chain.from_iterable(
+        itertools.combinations(s, r) for r in range(len(s) + 1)
+    ):
+        yield set(subset)
 
 
 def joint_probability(people, one_gene, two_genes, have_trait):
@@ -147,94 +161,117 @@ def joint_probability(people, one_gene, two_genes, have_trait):
     for person in have_trait:
         want_to_find[person]["trait"] = True
 
-
-    # returns prob of getting x genes from a single parent with y genes
-    def p_get_x_given_parent_y(x: int, y: int):
-        if x not in [0, 1] or y not in [0, 1, 2]:
-            raise ValueError
-        if y == 0:
-            if x == 0:
-                return 1 - PROBS["mutation"]
-            else:
-                return PROBS["mutation"]
-        elif y == 1:
-            return 0.5
-        else:
-            if x == 0:
-                return PROBS["mutation"]
-            else:
-                return 1 - PROBS["mutation"]
-
-
     joint_p = 1
     for person in want_to_find:
+        genes = want_to_find[person]["gene"]
+        trait = want_to_find[person]["trait"]
 
         # P(trait|no trait) == P(no trait|trait) == 0
-        if people[person]["trait"] is not None and want_to_find[person]["trait"] != people[person]["trait"]:
+        if people[person]["trait"] is not None and trait != people[person]["trait"]:
             return 0
 
         # === parents unknown ===
         if people[person]["mother"] is None and people[person]["father"] is None:
-            # population prob that someone has the same trait status as this person
-            p_persons_trait = sum([PROBS["gene"][i] * PROBS["trait"][i][want_to_find[person]["trait"]] for i in range(3)])
-
             if people[person]["trait"] is None:
                 # parents unknown, trait unknown - the persons probability is just from the population table
-                joint_p *= PROBS["trait"][want_to_find[person]["gene"]][want_to_find[person]["trait"]] * PROBS["gene"][want_to_find[person]["gene"]]
+                joint_p *= PROBS["trait"][genes][trait] * PROBS["gene"][genes]
             else:
                 # parents unknown, trait known - want P(#genes|trait_status) = P(trait_status|#genes) * P(#genes) / P(trait_status)
-                joint_p *= PROBS["trait"][want_to_find[person]["gene"]][want_to_find[person]["trait"]] * PROBS["gene"][want_to_find[person]["gene"]] / p_persons_trait
+                joint_p *= PROBS["trait"][genes][trait] * PROBS["gene"][genes] / TRAIT_PROB[trait]
             continue
 
         # === parents known ===
-        p_has_x_genes = 1
-        if want_to_find[person]["gene"] == 0:
+        # probability that each parent passes a copy of the gene on
+        p_pass = {}
+        for parent in ["mother", "father"]:
+            if people[person][parent] is None:
+                p_pass[parent] = PASS_PROB_UNKNOWN
+            else:
+                p_pass[parent] = PASS_PROB[want_to_find[people[person][parent]]["gene"]]
+
+        if genes == 0:
             # child has 0 = 0 from mother + 0 from father
-            for parent in ["mother", "father"]:
-                if people[person][parent] is None:
-                    p_has_x_genes *= (PROBS["gene"][0] * (1 - PROBS["mutation"])) + (PROBS["gene"][1] * 0.5) + (PROBS["gene"][2] * PROBS["mutation"])
-                else:
-                    p_has_x_genes *= p_get_x_given_parent_y(0, want_to_find[people[person][parent]]["gene"])
+            p_has_x_genes = (1 - p_pass["mother"]) * (1 - p_pass["father"])
+        elif genes == 1:
+            # P(child has 1) = P(0 from mother + 1 from father) + P(1 from mother + 0 from father)
+            p_has_x_genes = ((1 - p_pass["mother"]) * p_pass["father"] +
+                             p_pass["mother"] * (1 - p_pass["father"]))
+        else:
+            # child has 2 = 1 from mother + 1 from father
+            p_has_x_genes = p_pass["mother"] * p_pass["father"]
 
-        elif want_to_find[person]["gene"] == 1:
-            # P(child has 1 with 0 from mother + 1 from father)
-            p_m0f1 = 0
-            if people[person]["mother"] is None:
-                p_m0f1 = (PROBS["gene"][0] * (1 - PROBS["mutation"])) + (PROBS["gene"][1] * 0.5) + (PROBS["gene"][2] * PROBS["mutation"])
-            else:
-                p_m0f1 = p_get_x_given_parent_y(0, want_to_find[people[person]["mother"]]["gene"])
-            if people[person]["father"] is None:
-                p_m0f1 *= (PROBS["gene"][0] * PROBS["mutation"]) + (PROBS["gene"][1] * 0.5) + (PROBS["gene"][2] * (1 - PROBS["mutation"]))
-            else:
-                p_m0f1 *= p_get_x_given_parent_y(1, want_to_find[people[person]["father"]]["gene"])
+        # p_has_x_genes = P(has_x_genes|parents data)
+        # P(has_x_genes, trait_state) = p_has_x_genes * P(trait_state|has_x_genes)
+        joint_p *= p_has_x_genes * PROBS["trait"][genes][trait]
 
-            # P(child has 1 with 1 from mother + 0 from father)
-            p_m1f0 = 0
-            if people[person]["mother"] is None:
-                p_m1f0 = (PROBS["gene"][0] * PROBS["mutation"]) + (PROBS["gene"][1] * 0.5) + (PROBS["gene"][2] * (1 - PROBS["mutation"]))
-            else:
-                p_m1f0 = p_get_x_given_parent_y(1, want_to_find[people[person]["mother"]]["gene"])
-            if people[person]["father"] is None:
-                p_m1f0 *= (PROBS["gene"][0] * (1 - PROBS["mutation"])) + (PROBS["gene"][1] * 0.5) + (PROBS["gene"][2] * PROBS["mutation"])
-            else:
-                p_m1f0 *= p_get_x_given_parent_y(0, want_to_find[people[person]["father"]]["gene"])
+    return joint_p
 
-            # P(child has 1) = P(0 from mother + 1 from father) + P(1 from mother + 0 from father)
-            p_has_x_genes = p_m0f1 + p_m1f0
 
-        elif want_to_find[person]["gene"] == 2:
-            # child has 2 = 1 from mother + 1 from father
+def all_joint_probabilities(people):
+    """
+    Compute the joint probabilities of every gene/trait assignment at once.
+
+    Returns (names, joint) where joint[g, t] is the joint probability of the
+    assignment in which each person holds their base-3 digit of g as a gene
+    count and their bit of t as a trait status (digit/bit i belongs to
+    names[i]). Assignments that contradict known traits get probability 0.
+    """
+    names = list(people)
+    n = len(names)
+
+    # gene count of each person under every gene assignment: shape (3^n, n)
+    gene_counts = (np.arange(3 ** n)[:, None] // 3 ** np.arange(n)) % 3
+    # trait status of each person under every trait assignment: shape (2^n, n)
+    trait_bits = (np.arange(2 ** n)[:, None] >> np.arange(n)) & 1
+
+    # PROBS and its derived tables as arrays indexed by gene count/trait bit
+    gene_probs = np.array([PROBS["gene"][genes] for genes in range(3)])
+    trait_probs = np.array([
+        [PROBS["trait"][genes][False], PROBS["trait"][genes][True]]
+        for genes in range(3)
+    ])
+    pass_probs = np.array([PASS_PROB[genes] for genes in range(3)])
+    trait_pop = np.array([TRAIT_PROB[False], TRAIT_PROB[True]])
+
+    # multiply one (3^n, 2^n) factor per person into the joint table
+    joint = np.ones((3 ** n, 2 ** n))
+    for i, person in enumerate(names):
+        genes = gene_counts[:, i]
+
+        if people[person]["mother"] is None and people[person]["father"] is None:
+            # parents unknown - the population table, with the same Bayes
+            # correction as joint_probability when the trait is known
+            founder = gene_probs[:, None] * trait_probs
+            if people[person]["trait"] is not None:
+                founder = founder / trait_pop
+            factor = founder[genes][:, trait_bits[:, i]]
+        else:
+            # parents known - chance each parent passes a copy on, under
+            # every assignment of the parents' own gene counts
+            p_pass = {}
             for parent in ["mother", "father"]:
                 if people[person][parent] is None:
-                    p_has_x_genes *= (PROBS["gene"][0] * PROBS["mutation"]) + (PROBS["gene"][1] * 0.5) + (PROBS["gene"][2] * (1 - PROBS["mutation"]))
+                    p_pass[parent] = PASS_PROB_UNKNOWN
                 else:
-                    p_has_x_genes *= p_get_x_given_parent_y(1, want_to_find[people[person][parent]]["gene"])
+                    p_pass[parent] = pass_probs[gene_counts[:, names.index(people[person][parent])]]
+            p_mother, p_father = p_pass["mother"], p_pass["father"]
+            gene_factor = np.where(
+                genes == 0, (1 - p_mother) * (1 - p_father),
+                np.where(
+                    genes == 1,
+                    (1 - p_mother) * p_father + p_mother * (1 - p_father),
+                    p_mother * p_father
+                )
+            )
+            factor = gene_factor[:, None] * trait_probs[genes][:, trait_bits[:, i]]
 
-        # p_has_x_genes = P(has_x_genes|parents data)
-        # P(has_x_genes, trait_state) = p_has_x_genes * P(trait_state|has_x_genes)
-        joint_p *= p_has_x_genes * PROBS["trait"][want_to_find[person]["gene"]][want_to_find[person]["trait"]]
+        joint *= factor
 
-    return joint_p
+        # zero out every assignment that contradicts this person's evidence
+        if people[person]["trait"] is not None:
+            joint *= trait_bits[:, i] == int(people[person]["trait"])
+
+    return names, joint
 
 
 def update(probabilities, one_gene, two_genes, have_trait, p):
@@ -244,17 +281,17 @@ def update(probabilities, one_gene, two_genes, have_trait, p):
     Which value for each distribution is updated depends on whether
     the person is in `have_gene` and `have_trait`, respectively.
     """
-    for person in probabilities:
+    for person, distributions in probabilities.items():
         if person in one_gene:
-            probabilities[person]["gene"][1] += p
+            distributions["gene"][1] += p
         elif person in two_genes:
-            probabilities[person]["gene"][2] += p
+            distributions["gene"][2] += p
         else:
-            probabilities[person]["gene"][0] += p
+            distributions["gene"][0] += p
         if person in have_trait:
-            probabilities[person]["trait"][True] += p
+            distributions["trait"][True] += p
         else:
-            probabilities[person]["trait"][False] += p
+            distributions["trait"][False] += p
 
 
 def normalize(probabilities):
@@ -262,13 +299,17 @@ def normalize(probabilities):
     Update `probabilities` such that each probability distribution
     is normalized (i.e., sums to 1, with relative proportions the same).
     """
-    for person in probabilities:
-        factor = 1 / sum([probabilities[person]["trait"][b] for b in [True, False]])
+    for distributions in probabilities.values():
+        # look each distribution dict up once, and sum values directly
+        # instead of building a list first
+        trait_dist = distributions["trait"]
+        factor = 1 / sum(trait_dist.values())
         for b in [True, False]:
-            probabilities[person]["trait"][b] *= factor
-        factor = 1 / sum([probabilities[person]["gene"][i] for i in range(3)])
+            trait_dist[b] *= factor
+        gene_dist = distributions["gene"]
+        factor = 1 / sum(gene_dist.values())
         for i in range(3):
-            probabilities[person]["gene"][i] *= factor
+            gene_dist[i] *= factor
 
 
 if __name__ == "__main__":
@@ -3,9 +3,14 @@ import random
 import re
 import sys
 
+import numpy as np
+
 DAMPING = 0.85
 SAMPLES = 10000
 
+# Compiled once; a bytes pattern so pages can be scanned without decoding them
+HREF_RE = re.compile(rb"<a\s+(?:[^>]*?)href=\"([^\"]*)\"")
+
 
 def main():
     if len(sys.argv) != 2:
@@ -33,9 +38,8 @@ def crawl(directory):
     for filename in os.listdir(directory):
         if not filename.endswith(".html"):
             continue
-        with open(os.path.join(directory, filename)) as f:
-            contents = f.read()
-            links = re.findall(r"<a\s+(?:[^>]*?)href=\"([^\"]*)\"", contents)
+        with open(os.path.join(directory, filename), "rb") as f:
+            links = (link.decode("utf-8") for link in HREF_RE.findall(f.read()))
             pages[filename] = set(links) - {filename}
 
     # Only include links to other pages in the corpus
@@ -82,24 +86,30 @@ def sample_pagerank(corpus, damping_factor, n):
     their estimated PageRank value (a value between 0 and 1). All
     PageRank values should sum to 1.
     """
-    sample_size = n
     pages = list(corpus.keys())
-    sample_count = {page: 0 for page in pages}
-
-    # starting page
-    current_page = random.choice(pages)
-    sample_count[current_page] += 1
-    n -= 1
-
-    # sampling
-    while n > 0:
-        tm = transition_model(corpus, current_page, damping_factor)
-        # randomly choose new page with probabilities from tm
-        current_page = random.choices(pages, [tm[page] for page in pages])[0]
-        sample_count[current_page] += 1
-        n -= 1
+    num_pages = len(pages)
+
+    # cumulative transition distribution of each page, computed once instead
+    # of rebuilding the transition model on every sample
+    cumulative = np.empty((num_pages, num_pages))
+    for i, page in enumerate(pages):
+        tm = transition_model(corpus, page, damping_factor)
+        cumulative[i] = np.cumsum([tm[page] for page in pages])
+
+    # draw every random number up front, then walk the chain: each step picks
+    # the next page by binary search into the current page's cumulative row
+    uniforms = np.random.random(n - 1)
+    sample_count = np.zeros(num_pages, dtype=np.int64)
+    current = random.randrange(num_pages)
+    sample_count[current] += 1
+    for u in uniforms:
+        current = min(
+            int(np.searchsorted(cumulative[current], u, side="right")),
+            num_pages - 1
+        )
+        sample_count[current] += 1
 
-    return {page: sample_count[page] / sample_size for page in pages}
+    return {page: float(sample_count[i] / n) for i, page in enumerate(pages)}
 
 
 def iterate_pagerank(corpus, damping_factor):
@@ -112,38 +122,46 @@ def iterate_pagerank(corpus, damping_factor):
     PageRank values should sum to 1.
     """
     pages = list(corpus.keys())
-    pr = {page: 1 / len(corpus) for page in pages}
+    n = len(pages)
+    pr = np.full(n, 1 / n)
 
     if damping_factor == 0:
-        return pr
+        return {page: 1 / n for page in pages}
 
     # "A page that has no links at all should be interpreted as having one link for every page in the corpus (including itself)."
     for page in pages:
         if len(corpus[page]) == 0:
             corpus[page] = {p for p in pages}
 
-    # key:page, value: set of all pages that link to page
-    links_to = {page: set() for page in pages}
-    for page in pages:
-        for p in corpus:
-            if page in corpus[p]:
-                links_to[page].add(p)
-
-    # iteration
-    loop = True
-    while loop:
-        loop = False
-        for page in pages:
-            sigma = 0
-            for feeder in links_to[page]:
-                sigma += pr[feeder] / len(corpus[feeder])
-            old_pr = pr[page]
-            pr[page] = ((1 - damping_factor) / len(corpus)) + damping_factor * sigma
-            # continue looping only if change exceeds threshold for any page
-            if abs(old_pr - pr[page]) > 0.001:
-                loop = True
-
-    return pr
+    # M[i, j] = probability of following a link from page j to page i,
+    # so a whole update sweep is the matrix-vector product M @ pr
+    # One pass over each page's outgoing links fills the matrix directly,
+    # instead of testing every (page, page) pair for membership
+    page_index = {page: i for i, page in enumerate(pages)}
+    M = np.zeros((n, n))
+    for j, page in enumerate(pages):
+        weight = 1 / len(corpus[page])
+        for link in corpus[page]:
+            M[page_index[link], j] = weight
+
+    # iteration, reusing two buffers swapped between sweeps rather than
+    # allocating fresh vectors every round
+    base = (1 - damping_factor) / n
+    new_pr = np.empty(n)
+    diff = np.empty(n)
+    while True:
+        np.matmul(M, pr, out=new_pr)
+        new_pr *= damping_factor
+        new_pr += base
+        # stop once no page's rank changed by more than the threshold
+        np.subtract(new_pr, pr, out=diff)
+        np.abs(diff, out=diff)
+        if diff.max() <= 0.001:
+            pr = new_pr
+            break
+        pr, new_pr = new_pr, pr
+
+    return {page: float(pr[i]) for i, page in enumerate(pages)}
 
 
 if __name__ == "__main__":
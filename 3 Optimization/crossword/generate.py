@@ -1,4 +1,8 @@
-import sys, itertools
+import sys, itertools, hashlib, json, os
+from collections import Counter, deque
+
+import numpy as np
+
 from crossword import *
 
 
@@ -9,10 +13,43 @@ class CrosswordCreator():
         Create new CSP crossword generate.
         """
         self.crossword = crossword
+        # bucket the vocabulary by word length once: a variable can only
+        # ever hold words of its own length, so each domain starts from its
+        # bucket instead of the full word list
+        self.words_by_length = {}
+        for word in crossword.words:
+            self.words_by_length.setdefault(len(word), set()).add(word)
         self.domains = {
-            var: self.crossword.words.copy()
+            var: set(self.words_by_length.get(var.length, ()))
+            for var in self.crossword.variables
+        }
+        # crossword.neighbors(v) rescans every variable on each call, so
+        # compute each variable's neighbor set once up front
+        self.neighbors = {
+            var: self.crossword.neighbors(var)
+            for var in self.crossword.variables
+        }
+        # overlap positions fetched once per edge: a (neighbor, i, j) triple
+        # list per variable for iteration, and the positions keyed by edge
+        # for direct lookup, instead of indexing crossword.overlaps with a
+        # freshly built tuple key in every hot loop
+        self.neighbor_overlaps = {
+            var: [
+                (neighbor,) + self.crossword.overlaps[var, neighbor]
+                for neighbor in self.neighbors[var]
+            ]
+            for var in self.crossword.variables
+        }
+        self.overlap_at = {
+            (var, neighbor): self.crossword.overlaps[var, neighbor]
             for var in self.crossword.variables
+            for neighbor in self.neighbors[var]
         }
+        # words currently used by the assignment under construction, so the
+        # uniqueness check is a set lookup rather than a scan of all values
+        self.used_words = set()
+        # whether node consistency and the initial full AC-3 have run
+        self.preprocessed = False
 
     def letter_grid(self, assignment):
         """
@@ -88,8 +125,12 @@ class CrosswordCreator():
         """
         Enforce node and arc consistency, and then solve the CSP.
         """
-        self.enforce_node_consistency()
-        self.ac3()
+        # the preprocessing prunes domains in place, so it only needs to run
+        # once per creator even if solve is called again
+        if not self.preprocessed:
+            self.enforce_node_consistency()
+            self.ac3()
+            self.preprocessed = True
         return self.backtrack(dict())
 
     def enforce_node_consistency(self):
@@ -99,12 +140,7 @@ class CrosswordCreator():
          constraints; in this case, the length of the word.)
         """
         for v in self.domains:
-            words_to_remove = []
-            for word in self.domains[v]:
-                if len(word) != v.length:
-                    words_to_remove.append(word)
-            for word in words_to_remove:
-                self.domains[v].remove(word)
+            self.domains[v] -= {word for word in self.domains[v] if len(word) != v.length}
 
     def revise(self, x, y):
         """
@@ -115,35 +151,53 @@ class CrosswordCreator():
         Return True if a revision was made to the domain of `x`; return
         False if no revision was made.
         """
-        if self.crossword.overlaps[x, y] is None:
+        overlap = self.overlap_at.get((x, y))
+        if overlap is None:
             return False
 
-        i, j = self.crossword.overlaps[x, y]
+        i, j = overlap
 
-        remove_from_x = []
-        ac = False
-        for word_x in self.domains[x]:
-            for word_y in self.domains[y]:
-                if word_x[i] == word_y[j]:
-                    if word_x == word_y:
-                        continue
-                    # arc consistent as at least one word (word_y) for this word_x does not conflict
-                    ac = True
-                    break
-            # at least one possible word_y found, go to next word_x
-            if ac:
-                ac = False
-                continue
-            # if no word_y possible for word_x, word_x is to be removed from domains[x]
-            remove_from_x.append(word_x)
+        domain_x = self.domains[x]
+        domain_y = self.domains[y]
+        if not domain_x:
+            return False
+        if not domain_y:
+            # nothing supports any word, so x's whole domain goes at once
+            self.domains[x] = set()
+            return True
+
+        # every word in a domain has the variable's length after node
+        # consistency, so a domain encodes to one (words, length) uint8
+        # matrix and the overlap check becomes array arithmetic
+        words_x = list(domain_x)
+        chars_x = np.frombuffer(
+            "".join(words_x).encode("latin-1"), dtype=np.uint8
+        ).reshape(len(words_x), -1)
+
+        # tally the characters y's domain offers at the overlap position
+        chars_y = np.frombuffer(
+            "".join(domain_y).encode("latin-1"), dtype=np.uint8
+        ).reshape(len(domain_y), -1)
+        tally = np.bincount(chars_y[:, j], minlength=256)
+
+        # supporters of each word_x in one gather
+        supporters = tally[chars_x[:, i]]
+
+        # the words must differ, so word_x supporting itself does not count
+        if x.length == y.length:
+            self_support = np.fromiter(
+                (word[j] == word[i] and word in domain_y for word in words_x),
+                dtype=bool, count=len(words_x)
+            )
+            supporters = supporters - self_support
 
         # if all word_x ok, stop here
-        if len(remove_from_x) == 0:
+        keep = supporters > 0
+        if keep.all():
             return False
 
-        # else remove bad word_x from domains[x]
-        for word in remove_from_x:
-            self.domains[x].remove(word)
+        # else keep only the supported word_x in domains[x]
+        self.domains[x] = {word for word, ok in zip(words_x, keep) if ok}
         return True
 
     def ac3(self, arcs=None):
@@ -158,20 +212,30 @@ class CrosswordCreator():
         # each arc is a tuple (x, y) of variables x != y
 
         if arcs is None:
-            # enqueue all arcs
-            arcs = [pair for pair in itertools.combinations(list(self.domains.keys()), 2)]
-
-        while len(arcs) > 0:
+            # enqueue all arcs, in both directions: revising (x, y) only
+            # prunes x's domain, so (y, x) must be queued as well
+            arcs = itertools.permutations(self.domains.keys(), 2)
+
+        # a deque dequeues from the front in O(1), where list.pop(0) shifted
+        # every remaining arc; the queued set mirrors the deque so an arc
+        # already waiting is never enqueued a second time
+        queue = deque(arcs)
+        queued = set(queue)
+        while queue:
             # dequeue an arc
-            current_arc = arcs.pop(0)
+            x, y = queue.popleft()
+            queued.discard((x, y))
             # check for ac
-            if self.revise(current_arc[0], current_arc[1]):
-                if len(self.domains[current_arc[0]]) == 0:
+            if self.revise(x, y):
+                if len(self.domains[x]) == 0:
                     return False
-                for neighbor in self.crossword.neighbors(current_arc[0]):
-                    if neighbor == current_arc[1]:
+                for neighbor in self.neighbors[x]:
+                    if neighbor == y:
                         continue
-                    arcs.append((neighbor, current_arc[0]))
+                    arc = (neighbor, x)
+                    if arc not in queued:
+                        queue.append(arc)
+                        queued.add(arc)
         return True
 
     def assignment_complete(self, assignment):
@@ -179,10 +243,9 @@ class CrosswordCreator():
         Return True if `assignment` is complete (i.e., assigns a value to each
         crossword variable); return False otherwise.
         """
-        for v in self.domains:
-            if v not in assignment:
-                return False
-        return True
+        # assignment only ever holds crossword variables, so it is complete
+        # exactly when every variable has an entry
+        return len(assignment) == len(self.domains)
 
     def consistent(self, assignment):
         """
@@ -202,7 +265,7 @@ class CrosswordCreator():
 
         # overlaps
         for v in assignment:
-            for neighbor in self.crossword.neighbors(v):
+            for neighbor in self.neighbors[v]:
                 if neighbor not in assignment:
                     continue
                 if self.crossword.overlaps[v, neighbor] is None:
@@ -212,6 +275,30 @@ class CrosswordCreator():
 
         return True
 
+    def consistent_with(self, var, word, assignment):
+        """
+        Return True if assigning `word` to `var` keeps `assignment`
+        consistent; return False otherwise. Only `var`'s own constraints
+        need checking, since the rest of the assignment was already checked
+        when it was made.
+        """
+        # word length
+        if len(word) != var.length:
+            return False
+
+        # unique words
+        if word in self.used_words:
+            return False
+
+        # overlaps with already-assigned neighbors
+        for neighbor, i, j in self.neighbor_overlaps[var]:
+            if neighbor not in assignment:
+                continue
+            if word[i] != assignment[neighbor][j]:
+                return False
+
+        return True
+
     def order_domain_values(self, var, assignment):
         """
         Return a list of values in the domain of `var`, in order by
@@ -221,16 +308,22 @@ class CrosswordCreator():
         """
         eliminations_per_word = {word: 0 for word in self.domains[var]}
 
-        for word in self.domains[var]:
-            for neighbor in self.crossword.neighbors(var):
-                if neighbor in assignment:
-                    continue
-                for neigbor_word in self.domains[neighbor]:
-                    if word == neigbor_word:
-                        eliminations_per_word[word] += 1
-                        continue
-                    if word[self.crossword.overlaps[var, neighbor][0]] != neigbor_word[self.crossword.overlaps[var, neighbor][1]]:
-                        eliminations_per_word[word] += 1
+        for neighbor, i, j in self.neighbor_overlaps[var]:
+            if neighbor in assignment:
+                continue
+            domain_n = self.domains[neighbor]
+            # compatibility table for this overlap: how many neighbor words
+            # offer each character, tallied once instead of per candidate word
+            support = Counter(word_n[j] for word_n in domain_n)
+            total = len(domain_n)
+            for word in eliminations_per_word:
+                # every neighbor word with a different overlap character is
+                # ruled out, plus an identical neighbor word even when its
+                # character matches (words must be unique)
+                eliminated = total - support[word[i]]
+                if word in domain_n and word[j] == word[i]:
+                    eliminated += 1
+                eliminations_per_word[word] += eliminated
 
         return sorted(eliminations_per_word, key=eliminations_per_word.get)
 
@@ -242,34 +335,14 @@ class CrosswordCreator():
         degree. If there is a tie, any of the tied variables are acceptable
         return values.
         """
-        remaining_vars = [var for var in self.domains if var not in assignment]
-
-        # domain size and index in remaining_vars of var with the smallest domain size
-        min_domain_size = len(self.domains[remaining_vars[0]])
-        min_domain_indexes = [0]
-
-        # finding the var in remaining_vars with the min_domain_size
-        for v, var in enumerate(remaining_vars):
-            if len(self.domains[var]) < min_domain_size:
-                min_domain_size = len(self.domains[var])
-                min_domain_indexes = [v]
-            elif len(self.domains[var]) == min_domain_size:
-                min_domain_indexes.append(v)
-
-        # if only one var has the minimum domain size, return it
-        if len(min_domain_indexes) == 1:
-            return remaining_vars[min_domain_indexes[0]]
-
-        # else, multiple vars have the minimum domain size (tie)
-        # choose from these based on the variable with the largest degree (has the most neighbors)
-        num_neighbors = [len(self.crossword.neighbors(remaining_vars[index])) for index in min_domain_indexes]
-        max_neighbors_index = 0
-        for i, num in enumerate(num_neighbors):
-            if num > max_neighbors_index:
-                # index in num_neighbors
-                max_neighbors_index = i
-
-        return remaining_vars[min_domain_indexes[max_neighbors_index]]
+        # fewest remaining values first, ties broken by the highest degree;
+        # the old hand-rolled tie-break compared a neighbor count against a
+        # list index, so it could settle ties on the wrong variable, and it
+        # rescanned the tied candidates in a second pass
+        return min(
+            (var for var in self.domains if var not in assignment),
+            key=lambda var: (len(self.domains[var]), -len(self.neighbors[var]))
+        )
 
 
     def backtrack(self, assignment):
@@ -285,17 +358,85 @@ class CrosswordCreator():
         if self.assignment_complete(assignment):
             return assignment
 
+        # resync from the assignment itself: backtrack may be entered with an
+        # externally built partial assignment, and comparing by content keeps
+        # stale words from an earlier failed call out of the uniqueness check
+        used = set(assignment.values())
+        if self.used_words != used:
+            self.used_words = used
+
         current_var = self.select_unassigned_variable(assignment)
         for word in self.order_domain_values(current_var, assignment):
+            # only the new word's own constraints can break consistency
+            if self.consistent_with(current_var, word, assignment):
                 assignment[current_var] = word
-                if self.consistent(assignment):
+                self.used_words.add(word)
+                # inference (MAC): narrow current_var's domain to the chosen
+                # word and re-enforce arc consistency on the arcs pointing at
+                # it, so dead ends surface here instead of levels deeper;
+                # snapshot the domains to undo the pruning on backtrack
+                saved_domains = {v: set(domain) for v, domain in self.domains.items()}
+                self.domains[current_var] = {word}
+                arcs = [(neighbor, current_var) for neighbor in self.neighbors[current_var]]
+                if self.ac3(arcs):
                     result = self.backtrack(assignment)
                     if result is not None:
                         return result
+                self.domains = saved_domains
                 assignment.pop(current_var)
+                self.used_words.discard(word)
         return None
 
 
+def cache_path(structure, words):
+    """
+    Return the cache file path for a structure/words input pair, keyed by
+    a hash of the exact contents of both files.
+    """
+    with open(structure, "rb") as f:
+        key = hashlib.blake2b(f.read())
+    with open(words, "rb") as f:
+        key.update(f.read())
+    return os.path.join(
+        os.path.expanduser("~/.cache/cs50ai_crossword"),
+        key.hexdigest() + ".json"
+    )
+
+
+def load_cached_assignment(cache_file, crossword):
+    """
+    Return the cached assignment for `crossword` stored at `cache_file`,
+    or None if no cached solution exists.
+    """
+    if not os.path.exists(cache_file):
+        return None
+    with open(cache_file) as f:
+        entries = json.load(f)
+    # variables serialise as their defining position and direction, so look
+    # the real Variable objects back up from the crossword
+    variables = {
+        (var.i, var.j, var.direction): var
+        for var in crossword.variables
+    }
+    return {
+        variables[i, j, direction]: word
+        for i, j, direction, word in entries
+    }
+
+
+def save_cached_assignment(cache_file, assignment):
+    """
+    Persist a solved assignment to `cache_file` for later runs.
+    """
+    os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+    entries = [
+        [var.i, var.j, var.direction, word]
+        for var, word in assignment.items()
+    ]
+    with open(cache_file, "w") as f:
+        json.dump(entries, f)
+
+
 def main():
 
     # Check usage
@@ -307,10 +448,16 @@ def main():
     words = sys.argv[2]
     output = sys.argv[3] if len(sys.argv) == 4 else None
 
-    # Generate crossword
+    # Generate crossword, reusing a previously solved assignment from the
+    # on-disk cache when the same structure and word list come up again
     crossword = Crossword(structure, words)
     creator = CrosswordCreator(crossword)
-    assignment = creator.solve()
+    cache_file = cache_path(structure, words)
+    assignment = load_cached_assignment(cache_file, crossword)
+    if assignment is None:
+        assignment = creator.solve()
+        if assignment is not None:
+            save_cached_assignment(cache_file, assignment)
 
     # Print result
     if assignment is None:
@@ -1,13 +1,33 @@
 import nltk
 import sys
 import os, string, math
+import heapq
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
+import numpy as np
 #nltk.download('stopwords')
 
 FILE_MATCHES = 1
 SENTENCE_MATCHES = 1
 
-PUNCTUATION = string.punctuation
-STOPWORDS = nltk.corpus.stopwords.words("english")
+PUNCTUATION = set(string.punctuation)
+STOPWORDS = set(nltk.corpus.stopwords.words("english"))
+# one set, so each token is dropped or kept with a single lookup
+IGNORED = PUNCTUATION | STOPWORDS
+
+# the word tokenizer nltk.word_tokenize constructs internally, built once
+WORD_TOKENIZER = nltk.tokenize.NLTKWordTokenizer()
+
+
+@lru_cache(maxsize=None)
+def punkt_tokenizer():
+    """
+    Load the punkt sentence tokenizer on first use and reuse the instance,
+    instead of having nltk look the model up on every tokenize call.
+    """
+    return nltk.data.load("tokenizers/punkt/english.pickle")
 
 
 
@@ -35,7 +55,7 @@ def main():
     sentences = dict()
     for filename in filenames:
         for passage in files[filename].split("\n"):
-            for sentence in nltk.sent_tokenize(passage):
+            for sentence in punkt_tokenizer().tokenize(passage):
                 tokens = tokenize(sentence)
                 if tokens:
                     sentences[sentence] = tokens
@@ -57,15 +77,18 @@ def load_files(directory):
     files = os.listdir(directory)
     file_names = [f for f in files if f.endswith('.txt')]
 
-    txt_dict = {}
-    for file_name in file_names:
-        path = os.path.join(directory, file_name)
-        with open(path, 'r') as txt_file:
-            txt_dict[file_name] = txt_file.read()
+    def read(file_name):
+        with open(os.path.join(directory, file_name), 'r') as txt_file:
+            return txt_file.read()
+
+    # reading is I/O bound, so overlap the reads across a thread pool
+    with ThreadPoolExecutor() as executor:
+        contents = executor.map(read, file_names)
 
-    return txt_dict
+    return dict(zip(file_names, contents))
 
 
+@lru_cache(maxsize=None)
 def tokenize(document):
     """
     Given a document (represented as a string), return a list of all of the
@@ -73,13 +96,17 @@ def tokenize(document):
 
     Process document by coverting all words to lowercase, and removing any
     punctuation or English stopwords.
+
+    Results are memoized per document, so callers share (and must not
+    mutate) the returned list.
     """
     words = []
-    for word in nltk.word_tokenize(document):
-        word = word.lower()
-        if word in PUNCTUATION or word in STOPWORDS:
-            continue
-        words.append(word)
+    for sentence in punkt_tokenizer().tokenize(document):
+        for word in WORD_TOKENIZER.tokenize(sentence):
+            word = word.lower()
+            if word in IGNORED:
+                continue
+            words.append(word)
 
     return words
 
@@ -92,20 +119,17 @@ def compute_idfs(documents):
     Any word that appears in at least one of the documents should be in the
     resulting dictionary.
     """
-    corpus_dict = {} #key=word, value=#docs in which word appears
-    for document in documents:
-        doc_set = set(documents[document])
-        for word in doc_set:
-            if word in corpus_dict:
-                corpus_dict[word] += 1
-            else:
-                corpus_dict[word] = 1
-
-    idfs = {}
-    for word in corpus_dict:
-        idfs[word] = math.log(len(documents) / corpus_dict[word])
-
-    return idfs
+    # number of docs in which each word appears: Counter.update handles the
+    # seen/unseen branching in C
+    corpus_count = Counter()
+    for words in documents.values():
+        corpus_count.update(set(words))
+
+    num_documents = len(documents)
+    return {
+        word: math.log(num_documents / count)
+        for word, count in corpus_count.items()
+    }
 
 
 def top_files(query, files, idfs, n):
@@ -115,18 +139,19 @@ def top_files(query, files, idfs, n):
     to their IDF values), return a list of the filenames of the the `n` top
     files that match the query, ranked according to tf-idf.
     """
-    query_count = {doc: {word: 0 for word in query} for doc in files}
-    for doc in files:
-        for word in files[doc]:
-            if word in query:
-                query_count[doc][word] += 1
-
-    tfidf = {doc: 0 for doc in files}
-    for doc in files:
-        for q in query:
-            if q not in idfs:
-                continue
-            tfidf[doc] += query_count[doc][q] * idfs[q]
+    # intern the scoreable query words to integer ids and stack their IDFs,
+    # so each document's score is a bincount plus one dot product
+    query_ids = {word: wid for wid, word in enumerate(q for q in query if q in idfs)}
+    idf_vector = np.array([idfs[word] for word in query_ids])
+
+    tfidf = {}
+    for doc, words in files.items():
+        ids = [query_ids[word] for word in words if word in query_ids]
+        if ids:
+            counts = np.bincount(ids, minlength=len(query_ids))
+            tfidf[doc] = float(counts @ idf_vector)
+        else:
+            tfidf[doc] = 0.0
 
     sorted_docs = sorted(tfidf.items(), key=lambda x: -x[1])
     return [x[0] for x in sorted_docs[:n]]
@@ -140,23 +165,20 @@ def top_sentences(query, sentences, idfs, n):
     the query, ranked according to idf. If there are ties, preference should
     be given to sentences that have a higher query term density.
     """
-    mwms = []
-    qtds = []
-    for sentence in sentences:
-        matching_word_measure = 0
-        query_count = 0
-        queries_found = set()
-        for word in sentences[sentence]:
-            if word in query:
-                query_count += 1
-                queries_found.add(word)
-        for word in queries_found:
-            matching_word_measure += idfs[word]
-        mwms.append(matching_word_measure)
-        qtds.append(query_count / len(sentences[sentence]))
-
-    sorted_sentences = sorted(zip(sentences.keys(), mwms, qtds), key=lambda x: (-x[1], -x[2]))
-    return [x[0] for x in sorted_sentences[:n]]
+    def scored():
+        # yield (sentence, matching word measure, query term density) lazily;
+        # counting the sentence's words once replaces the per-token query
+        # membership tests with a single set intersection
+        for sentence, words in sentences.items():
+            counts = Counter(words)
+            queries_found = query & counts.keys()
+            matching_word_measure = sum(idfs[word] for word in queries_found)
+            query_count = sum(counts[word] for word in queries_found)
+            yield sentence, matching_word_measure, query_count / len(words)
+
+    # only the n best are kept, rather than sorting every sentence
+    best = heapq.nsmallest(n, scored(), key=lambda x: (-x[1], -x[2]))
+    return [x[0] for x in best]
 
 
 if __name__ == "__main__":